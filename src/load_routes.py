@@ -2,35 +2,67 @@ import csv
 import sqlite3
 
 DB_FILE = "railway.db"
-CSV_FILE = "eu_rail_network.csv" 
+CSV_FILE = "eu_rail_network.csv"
+
+# accepted header names per field, in order of preference
+COLUMNS = {
+    "rid": ("Route ID", "route_id", "id"),
+    "dep_city": ("Departure City", "From"),
+    "arr_city": ("Arrival City", "To"),
+    "dep_time": ("Departure Time", "Dep"),
+    "arr_time": ("Arrival Time", "Arr"),
+    "ttype": ("Train Type", "Type"),
+    "days": ("Days of Operation", "Days"),
+    "f1": ("First Class ticket rate (in euro)", "First Class"),
+    "f2": ("Second Class ticket rate (in euro)", "Second Class"),
+}
+
+def resolve_columns(header):
+    # header aliases are looked up once, not per row
+    pos = {name: i for i, name in enumerate(header)}
+    return {
+        field: [pos[a] for a in aliases if a in pos]
+        for field, aliases in COLUMNS.items()
+    }
+
+def pick(row, idxs):
+    for i in idxs:
+        if i < len(row) and row[i]:
+            return row[i]
+    return ""
+
+INSERT_SQL = """
+    INSERT OR REPLACE INTO Route
+    (route_id, departure_city, arrival_city, departure_time, arrival_time,
+     train_type, days_of_op, first_class, second_class)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
 def main():
     conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
+    # bulk load: WAL + one sync per commit instead of per statement
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
 
+    rows = []
     with open(CSV_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        cols = resolve_columns(next(reader, []))
         for row in reader:
-            rid = row.get("Route ID") or row.get("route_id") or row.get("id")
-            dep_city = row.get("Departure City") or row.get("From")
-            arr_city = row.get("Arrival City") or row.get("To")
-            dep_time = row.get("Departure Time") or row.get("Dep")
-            arr_time = row.get("Arrival Time") or row.get("Arr")
-            ttype = row.get("Train Type") or row.get("Type") or ""
-            days = row.get("Days of Operation") or row.get("Days") or ""
-            f1 = row.get("First Class ticket rate (in euro)") or row.get("First Class") or ""
-            f2 = row.get("Second Class ticket rate (in euro)") or row.get("Second Class") or ""
+            rid = pick(row, cols["rid"])
+            dep_city = pick(row, cols["dep_city"])
+            arr_city = pick(row, cols["arr_city"])
+            dep_time = pick(row, cols["dep_time"])
+            arr_time = pick(row, cols["arr_time"])
+            ttype = pick(row, cols["ttype"])
+            days = pick(row, cols["days"])
+            f1 = pick(row, cols["f1"])
+            f2 = pick(row, cols["f2"])
 
             if not (rid and dep_city and arr_city and dep_time and arr_time):
                 continue
 
-            cur.execute(
-                """
-                INSERT OR REPLACE INTO Route
-                (route_id, departure_city, arrival_city, departure_time, arrival_time,
-                 train_type, days_of_op, first_class, second_class)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+            rows.append(
                 (
                     str(rid).strip(),
                     dep_city.strip(),
@@ -41,10 +73,15 @@ def main():
                     days.strip(),
                     float(f1) if f1 else None,
                     float(f2) if f2 else None,
-                ),
+                )
             )
 
-    conn.commit()
+    # single transaction for the whole file
+    with conn:
+        conn.executemany(INSERT_SQL, rows)
+    # back to rollback-journal mode: checkpoints the WAL into railway.db and
+    # removes the -wal/-shm files, so the DB file is complete on its own
+    conn.execute("PRAGMA journal_mode=DELETE")
     conn.close()
     print("Routes loaded into DB from", CSV_FILE)
 
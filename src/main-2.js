@@ -17,8 +17,15 @@
   // ---------------- Domain helpers ----------------
 
   class TimeUtils {
+    static TIME_RE = /^\s*(\d{1,2}):(\d{2})\s*$/;
+
     static parseTimeToMin(str) {
       if (!str) return null;
+      // fast path for the usual "HH:MM"; anything else goes through the
+      // general split below
+      const match = TimeUtils.TIME_RE.exec(str);
+      if (match) return Number(match[1]) * 60 + Number(match[2]);
+
       const parts = str.trim().split(":");
       if (parts.length !== 2) return null;
       const h = Number(parts[0]);
@@ -42,14 +49,31 @@
       return days[dt.getDay()];
     }
 
+    static parsed = new Map();
+
     static parseDaysOfOperation(str) {
       if (!str) return [];
+      // routes repeat a handful of day strings; share one frozen array each
+      let days = DayUtils.parsed.get(str);
+      if (!days) {
+        days = Object.freeze(DayUtils.splitDays(str));
+        DayUtils.parsed.set(str, days);
+      }
+      return days;
+    }
+
+    static splitDays(str) {
       return str
         .split(/[,/ ]+/)
         .map((d) => d.trim().slice(0, 3))
         .filter(Boolean)
         .map((d) => d[0].toUpperCase() + d.slice(1).toLowerCase()); // Mon, Tue...
     }
+
+    // Mon=1<<0 ... Sun=1<<6; see RouteTable.assignDayBits for other tokens
+    static DAY_BITS = new Map(
+      ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"].map((d, i) => [d, 1 << i])
+    );
   }
 
   class TimeOfDay {
@@ -57,12 +81,25 @@
       this.minutes = minutes;
       this.h = Math.floor(minutes / 60);
       this.m = minutes % 60;
+      Object.freeze(this);
+    }
+
+    // one shared instance per minute value instead of two per route
+    static instances = new Map();
+
+    static of(minutes) {
+      let t = TimeOfDay.instances.get(minutes);
+      if (!t) {
+        t = new TimeOfDay(minutes);
+        TimeOfDay.instances.set(minutes, t);
+      }
+      return t;
     }
 
     static fromString(str) {
       const mins = TimeUtils.parseTimeToMin(str);
       if (mins == null) return null;
-      return new TimeOfDay(mins);
+      return TimeOfDay.of(mins);
     }
 
     toString() {
@@ -91,10 +128,17 @@
       this.dep_time = dep_time;
       this.arr_time = arr_time;
       this.train_type = train_type;
+      // lowercased once here instead of on every comparison in the search
+      this.dep_city_lc = dep_city.toLowerCase();
+      this.arr_city_lc = arr_city.toLowerCase();
+      this.train_type_lc = train_type.toLowerCase();
       this.days = days;
       this.daysStr = daysStr;
       this.price_first = isNaN(price_first) ? null : price_first;
       this.price_second = isNaN(price_second) ? null : price_second;
+      // minutes since midnight, cached so the search loops compare plain ints
+      this.dep_min = this.dep_time.minutes;
+      this.arr_min = this.arr_time.minutes;
       this.duration = this.arr_time.minutes - this.dep_time.minutes;
     }
 
@@ -182,44 +226,6 @@
       });
     }
 
-    matchesDay(dayFilterArr) {
-      if (!dayFilterArr.length) return true;
-      if (!this.days.length) return true;
-      return dayFilterArr.some((d) => this.days.includes(d));
-    }
-
-    matchesQuery(query) {
-      if (
-        query.train_type &&
-        this.train_type &&
-        !this.train_type
-          .toLowerCase()
-          .includes(query.train_type.toLowerCase())
-      ) {
-        return false;
-      }
-      if (
-        query.dep_from != null &&
-        this.dep_time.minutes < query.dep_from
-      )
-        return false;
-      if (query.dep_to != null && this.dep_time.minutes > query.dep_to)
-        return false;
-      if (
-        query.max_price_first != null &&
-        this.price_first != null &&
-        this.price_first > query.max_price_first
-      )
-        return false;
-      if (
-        query.max_price_second != null &&
-        this.price_second != null &&
-        this.price_second > query.max_price_second
-      )
-        return false;
-      return true;
-    }
-
     priceForClass(classType) {
       if (classType === "first") {
         return this.price_first != null ? this.price_first : Infinity;
@@ -233,32 +239,17 @@
       this.legs = legs;
       this.chosenClass = chosenClass;
       this.transfers = transfers || [];
-    }
-
-    get stops() {
-      return Math.max(0, this.legs.length - 1);
-    }
-
-    get totalDuration() {
-      return (
-        this.legs[this.legs.length - 1].arr_time.minutes -
-        this.legs[0].dep_time.minutes
-      );
-    }
-
-    get price() {
-      return this.legs.reduce(
-        (sum, leg) => sum + leg.priceForClass(this.chosenClass),
+      // legs and class never change, so compute these once instead of on
+      // every sort comparison / render
+      this.stops = Math.max(0, legs.length - 1);
+      this.totalDuration = legs[legs.length - 1].arr_min - legs[0].dep_min;
+      this.price = legs.reduce(
+        (sum, leg) => sum + leg.priceForClass(chosenClass),
         0
       );
-    }
-
-    get path() {
-      const cities = [
-        this.legs[0].dep_city,
-        ...this.legs.map((l) => l.arr_city)
-      ];
-      return cities.join(" → ");
+      this.path = [legs[0].dep_city, ...legs.map((l) => l.arr_city)].join(
+        " → "
+      );
     }
 
     isValidOnDay(dayAbbrev) {
@@ -367,18 +358,379 @@
     }
   }
 
+  // ---------------- Columnar route store ----------------
+
+  // Parallel typed-array columns over a route list so the query filters run
+  // as tight loops over numbers instead of per-route method calls.
+  class RouteTable {
+    static cache = new WeakMap();
+
+    constructor(routes) {
+      const n = routes.length;
+      this.routes = routes;
+      this.length = n;
+      this.depMin = new Int16Array(n);
+      this.arrMin = new Int16Array(n);
+      this.priceFirst = new Float64Array(n);
+      this.priceSecond = new Float64Array(n);
+      // days of operation as a bitmask per row, computed once per table so
+      // the days filter is a single AND (empty when dayBits is null)
+      this.daysMask = new Int32Array(n);
+      this.dayBits = RouteTable.assignDayBits(routes);
+      this.trainType = new Array(n);
+      // city names interned to ids so the search kernel compares ints
+      this.cityIds = new Map();
+      this.cityNames = [];
+      this.cityLower = [];
+      this.cityIdsByLower = new Map();
+      this.depId = new Int32Array(n);
+      this.arrId = new Int32Array(n);
+      // row indices per (dep, arr) city pair, in row order
+      this.pairRows = [];
+
+      // backend rows have unique ids (primary key); an uploaded CSV may repeat
+      // a row verbatim, and such copies are left out of the searchable rows
+      const uniqueIds = new Set(routes.map((r) => r.route_id)).size === n;
+      const seenRows = uniqueIds ? null : new Set();
+      const rows = [];
+
+      routes.forEach((r, i) => {
+        this.depId[i] = this.internCity(r.dep_city, r.dep_city_lc);
+        this.arrId[i] = this.internCity(r.arr_city, r.arr_city_lc);
+        if (seenRows) {
+          const key = JSON.stringify([
+            r.route_id,
+            r.dep_city,
+            r.arr_city,
+            r.dep_min,
+            r.arr_min,
+            r.train_type,
+            r.daysStr,
+            r.price_first,
+            r.price_second
+          ]);
+          if (seenRows.has(key)) return;
+          seenRows.add(key);
+        }
+        rows.push(i);
+        const toArr = this.pairRows[this.depId[i]];
+        if (!toArr.has(this.arrId[i])) toArr.set(this.arrId[i], []);
+        toArr.get(this.arrId[i]).push(i);
+        this.depMin[i] = r.dep_min;
+        this.arrMin[i] = r.arr_min;
+        this.priceFirst[i] = r.price_first != null ? r.price_first : NaN;
+        this.priceSecond[i] = r.price_second != null ? r.price_second : NaN;
+        if (this.dayBits) this.daysMask[i] = this.maskOfDays(r.days);
+        this.trainType[i] = r.train_type_lc;
+      });
+      this.allRows = Int32Array.from(rows);
+    }
+
+    // day token -> bit for this table. Mon..Sun are fixed; any other token in
+    // the data (e.g. "Dai") gets the next free bit, so mask overlap is exactly
+    // the array overlap. Returns null if there are more tokens than bits.
+    static assignDayBits(routes) {
+      const bits = new Map(DayUtils.DAY_BITS);
+      for (const r of routes) {
+        for (const d of r.days) {
+          if (bits.has(d)) continue;
+          if (bits.size > 30) return null;
+          bits.set(d, 1 << bits.size);
+        }
+      }
+      return bits;
+    }
+
+    // tokens no route uses map to no bit, so they match nothing
+    maskOfDays(days) {
+      return days.reduce((mask, d) => mask | (this.dayBits.get(d) || 0), 0);
+    }
+
+    internCity(name, lower) {
+      let id = this.cityIds.get(name);
+      if (id === undefined) {
+        id = this.cityNames.length;
+        this.cityIds.set(name, id);
+        this.cityNames.push(name);
+        this.cityLower.push(lower);
+        this.pairRows.push(new Map());
+        if (!this.cityIdsByLower.has(lower)) this.cityIdsByLower.set(lower, []);
+        this.cityIdsByLower.get(lower).push(id);
+      }
+      return id;
+    }
+
+    get cityCount() {
+      return this.cityNames.length;
+    }
+
+    // Uint8Array over city ids, 1 where the name matches case-insensitively
+    citiesNamed(name) {
+      const hits = new Uint8Array(this.cityCount);
+      (this.cityIdsByLower.get(name.toLowerCase()) || []).forEach((id) => {
+        hits[id] = 1;
+      });
+      return hits;
+    }
+
+    // rows from any of the src cities straight to any of the dst cities
+    rowsBetween(srcHits, dstHits) {
+      const rows = [];
+      srcHits.forEach((hit, id) => {
+        if (!hit) return;
+        this.pairRows[id].forEach((list, arr) => {
+          if (dstHits[arr]) list.forEach((i) => rows.push(i));
+        });
+      });
+      return Int32Array.from(rows).sort();
+    }
+
+    // one table per loaded route list
+    static of(routes) {
+      let table = RouteTable.cache.get(routes);
+      if (!table) {
+        table = new RouteTable(routes);
+        RouteTable.cache.set(routes, table);
+      }
+      return table;
+    }
+
+    // query filters (days overlap, train type substring, departure window,
+    // max prices) applied to the given row indices (all rows by default);
+    // routes missing a field pass that filter. Returns the matching ones.
+    filter(query, rows = this.allRows) {
+      // each active predicate narrows the row list, so later passes only see
+      // survivors; inactive ones cost nothing and no filter returns rows as is
+      let out = rows;
+
+      if (query.days.length) {
+        if (this.dayBits) {
+          const wanted = this.maskOfDays(query.days);
+          const days = this.daysMask;
+          out = out.filter((i) => !days[i] || (days[i] & wanted) !== 0);
+        } else {
+          const wanted = query.days;
+          const routes = this.routes;
+          out = out.filter((i) => {
+            const days = routes[i].days;
+            return !days.length || wanted.some((d) => days.includes(d));
+          });
+        }
+      }
+      if (query.train_type) {
+        const needle = query.train_type.toLowerCase();
+        const types = this.trainType;
+        out = out.filter((i) => !types[i] || types[i].includes(needle));
+      }
+      if (query.dep_from != null || query.dep_to != null) {
+        // inclusive window; from > to wraps past midnight (e.g. 22:00-02:00)
+        const lo = query.dep_from != null ? query.dep_from : -Infinity;
+        const hi = query.dep_to != null ? query.dep_to : Infinity;
+        const dep = this.depMin;
+        out =
+          lo <= hi
+            ? out.filter((i) => dep[i] >= lo && dep[i] <= hi)
+            : out.filter((i) => dep[i] >= lo || dep[i] <= hi);
+      }
+      if (query.max_price_first != null) {
+        const max = query.max_price_first;
+        const price = this.priceFirst;
+        out = out.filter((i) => !(price[i] > max));
+      }
+      if (query.max_price_second != null) {
+        const max = query.max_price_second;
+        const price = this.priceSecond;
+        out = out.filter((i) => !(price[i] > max));
+      }
+
+      return out;
+    }
+  }
+
+  // Search kernel: integer-only walk over the table columns. Returns one
+  // flat Int32Array of row indices per itinerary length (stride = legs).
+  //
+  // `transfer` holds the layover rule as plain ints (see
+  // ItineraryService.transferRules) so the hot loop has no callbacks.
+  //
+  // `limits` guards against blowup at busy hubs, at the cost of exactness:
+  //  - perHour: after each arrival, only the first perHour boardable
+  //    departures per (next city, hour) are followed. Trains that leave
+  //    before the arrival plus minTransfer never count, so a feasible
+  //    connection is only dropped in favour of earlier feasible ones to the
+  //    same city in the same hour (first legs are never capped)
+  //  - maxResults: enumeration stops once this many itineraries are found.
+  //    Lengths are enumerated in order (all direct, then all 1-stop, ...),
+  //    so the cutoff only ever drops the itineraries with the most legs.
+  function enumerateConnections(
+    table,
+    rows,
+    isSrc,
+    isDst,
+    maxLegs,
+    transfer,
+    limits
+  ) {
+    const { depId, arrId, depMin, arrMin, cityCount } = table;
+    const { minTransfer, dayStart, nightStart, maxDay, maxNight } = transfer;
+    const { perHour, maxResults } = limits;
+
+    // CSR adjacency of connection candidates per departure city, sorted by
+    // departure time
+    const byCity = Array.from({ length: cityCount }, () => []);
+    for (const i of rows) byCity[depId[i]].push(i);
+    const start = new Int32Array(cityCount + 1);
+    const kept = [];
+    byCity.forEach((list, c) => {
+      list.sort((a, b) => depMin[a] - depMin[b] || a - b);
+      for (const i of list) kept.push(i);
+      start[c + 1] = kept.length;
+    });
+    const adj = Int32Array.from(kept);
+
+    // same lists restricted to rows arriving at the destination, used for
+    // the last allowed leg so it skips every other departure
+    const lastStart = new Int32Array(cityCount + 1);
+    const lastKept = [];
+    for (let c = 0; c < cityCount; c++) {
+      for (let p = start[c]; p < start[c + 1]; p++) {
+        if (isDst[arrId[adj[p]]]) lastKept.push(adj[p]);
+      }
+      lastStart[c + 1] = lastKept.length;
+    }
+    const lastAdj = Int32Array.from(lastKept);
+
+    // reach[k][c] = 1 if the destination can be reached from c within k legs
+    // (reverse BFS), so dead-end transfers are pruned before expansion
+    const reach = [new Uint8Array(cityCount), new Uint8Array(cityCount)];
+    for (const i of rows) if (isDst[arrId[i]]) reach[1][depId[i]] = 1;
+    for (let k = 2; k <= maxLegs; k++) {
+      const prev = reach[k - 1];
+      const cur = prev.slice();
+      for (const i of rows) if (prev[arrId[i]]) cur[depId[i]] = 1;
+      reach.push(cur);
+    }
+
+    const out = [];
+    const counts = new Int32Array(maxLegs);
+    for (let len = 1; len <= maxLegs; len++) out.push(new Int32Array(16 * len));
+    const path = new Int32Array(maxLegs);
+    let total = 0;
+
+    // per-depth perHour counters keyed by next city; `capVisit` tags which
+    // walk call a slot belongs to so nothing has to be cleared between calls
+    const perDepth = () =>
+      Array.from({ length: maxLegs }, () => new Int32Array(cityCount));
+    const capVisit = perDepth();
+    const capHour = perDepth();
+    const capCount = perDepth();
+    let visits = 0;
+
+    const emit = (len) => {
+      let buf = out[len - 1];
+      if ((counts[len - 1] + 1) * len > buf.length) {
+        const grown = new Int32Array(buf.length * 2);
+        grown.set(buf);
+        buf = out[len - 1] = grown;
+      }
+      buf.set(path.subarray(0, len), counts[len - 1] * len);
+      counts[len - 1]++;
+      total++;
+    };
+
+    // extend path[0..depth) to exactly `len` legs ending at the destination
+    const walk = (depth, len) => {
+      const last = path[depth - 1];
+      const city = arrId[last];
+      const remaining = len - depth;
+      if (remaining === 0) {
+        if (isDst[city]) emit(len);
+        return;
+      }
+      if (!reach[remaining][city]) return;
+
+      const from = remaining === 1 ? lastStart : start;
+      const list = remaining === 1 ? lastAdj : adj;
+      const end = from[city + 1];
+
+      // binary search for the first departure after this arrival
+      const arr = arrMin[last];
+      const maxGap = arr >= dayStart && arr < nightStart ? maxDay : maxNight;
+      let lo = from[city];
+      let hi = end;
+      while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (depMin[list[mid]] <= arr) lo = mid + 1;
+        else hi = mid;
+      }
+      const visit = ++visits;
+      const seenVisit = capVisit[depth];
+      const seenHour = capHour[depth];
+      const seen = capCount[depth];
+      for (let p = lo; p < end; p++) {
+        const r = list[p];
+        const layover = depMin[r] - arr;
+        if (layover > maxGap) break;
+        if (layover < minTransfer) continue;
+
+        // departures are in time order, so a new hour restarts the count
+        const to = arrId[r];
+        const hour = (depMin[r] / 60) | 0;
+        if (seenVisit[to] !== visit || seenHour[to] !== hour) {
+          seenVisit[to] = visit;
+          seenHour[to] = hour;
+          seen[to] = 0;
+        }
+        if (seen[to] >= perHour) continue;
+        seen[to]++;
+
+        path[depth] = r;
+        walk(depth + 1, len);
+        if (total >= maxResults) return;
+      }
+    };
+
+    for (let len = 1; len <= maxLegs; len++) {
+      for (const i of rows) {
+        if (total >= maxResults) break;
+        if (!isSrc[depId[i]]) continue;
+        path[0] = i;
+        walk(1, len);
+      }
+    }
+
+    return out.map((buf, idx) => buf.subarray(0, counts[idx] * (idx + 1)));
+  }
+
   // ---------------- Services ----------------
 
   class ItineraryService {
-    isLayoverAllowed(prevArrMin, nextDepMin, minTransfer) {
-      const layover = nextDepMin - prevArrMin;
-      if (layover < minTransfer) return false;
+    static MAX_STOPS = 2;
+    static CACHE_SIZE = 8;
+    static DAY_START = 6 * 60;
+    static NIGHT_START = 22 * 60;
+    static MAX_LAYOVER_DAY = 120;
+    static MAX_LAYOVER_NIGHT = 30;
+    // hub guards, see enumerateConnections
+    static TRANSFERS_PER_HOUR = 5;
+    static MAX_RESULTS = 1000;
+
+    constructor() {
+      // loaded route list -> Map(query key -> itineraries), LRU by insertion
+      this.cache = new WeakMap();
+    }
 
-      const DAY_START = 6 * 60;
-      const NIGHT_START = 22 * 60;
-      const isDaytime =
-        prevArrMin >= DAY_START && prevArrMin < NIGHT_START;
-      return isDaytime ? layover <= 120 : layover <= 30;
+    // the layover rule: at least minTransfer minutes, and at most
+    // MAX_LAYOVER_DAY after an arrival between DAY_START and NIGHT_START,
+    // MAX_LAYOVER_NIGHT otherwise; enforced by enumerateConnections
+    transferRules(minTransfer) {
+      return {
+        minTransfer,
+        dayStart: ItineraryService.DAY_START,
+        nightStart: ItineraryService.NIGHT_START,
+        maxDay: ItineraryService.MAX_LAYOVER_DAY,
+        maxNight: ItineraryService.MAX_LAYOVER_NIGHT
+      };
     }
 
     buildTransfers(legs) {
@@ -388,7 +740,7 @@
         const next = legs[i + 1];
         transfers.push({
           city: curr.arr_city,
-          layover: next.dep_time.minutes - curr.arr_time.minutes
+          layover: next.dep_min - curr.arr_min
         });
       }
       return transfers;
@@ -396,108 +748,73 @@
 
     find(routes, query) {
       if (!query.dep_city || !query.arr_city) return [];
-
-      const filtered = routes.filter(
-        (r) => r.matchesDay(query.days) && r.matchesQuery(query)
-      );
-      const results = [];
-      const fromLower = query.dep_city.toLowerCase();
-      const toLower = query.arr_city.toLowerCase();
-      const chosenClass = query.chosenClass || "second";
-
-      const legPrice = (leg) => leg.priceForClass(chosenClass);
-      const isPriceable = (legs) =>
-        legs.every((l) => Number.isFinite(legPrice(l)));
-
-      // Direct
-      if (query.maxStops >= 0) {
-        filtered.forEach((r) => {
-          if (
-            r.dep_city.toLowerCase() === fromLower &&
-            r.arr_city.toLowerCase() === toLower &&
-            isPriceable([r])
-          ) {
-            results.push(
-              new Itinerary({
-                legs: [r],
-                chosenClass,
-                transfers: []
-              })
-            );
-          }
-        });
+      if (query.maxStops < 0) return [];
+
+      if (!this.cache.has(routes)) this.cache.set(routes, new Map());
+      const cached = this.cache.get(routes);
+      const key = JSON.stringify(query);
+      if (cached.has(key)) {
+        const hit = cached.get(key);
+        cached.delete(key);
+        cached.set(key, hit);
+        return hit.slice();
       }
 
-      // 1-stop
-      if (query.maxStops >= 1) {
-        filtered.forEach((r1) => {
-          if (r1.dep_city.toLowerCase() !== fromLower) return;
-          filtered.forEach((r2) => {
-            if (r2.arr_city.toLowerCase() !== toLower) return;
-            if (r1.arr_city !== r2.dep_city) return;
-            if (r2.dep_time.minutes <= r1.arr_time.minutes) return;
-            if (
-              !this.isLayoverAllowed(
-                r1.arr_time.minutes,
-                r2.dep_time.minutes,
-                query.minTransfer
-              )
-            )
-              return;
-            const legs = [r1, r2];
-            if (!isPriceable(legs)) return;
-            results.push(
-              new Itinerary({
-                legs,
-                chosenClass,
-                transfers: this.buildTransfers(legs)
-              })
-            );
-          });
-        });
+      const results = this.search(routes, query);
+      cached.set(key, results);
+      if (cached.size > ItineraryService.CACHE_SIZE) {
+        cached.delete(cached.keys().next().value);
       }
+      return results.slice();
+    }
 
-      // 2-stop
-      if (query.maxStops >= 2) {
-        filtered.forEach((r1) => {
-          if (r1.dep_city.toLowerCase() !== fromLower) return;
-          filtered.forEach((r2) => {
-            if (r2.dep_city !== r1.arr_city) return;
-            if (r2.dep_time.minutes <= r1.arr_time.minutes) return;
-            filtered.forEach((r3) => {
-              if (r3.arr_city.toLowerCase() !== toLower) return;
-              if (r3.dep_city !== r2.arr_city) return;
-              if (r3.dep_time.minutes <= r2.arr_time.minutes) return;
-              if (
-                !this.isLayoverAllowed(
-                  r1.arr_time.minutes,
-                  r2.dep_time.minutes,
-                  query.minTransfer
-                )
-              )
-                return;
-              if (
-                !this.isLayoverAllowed(
-                  r2.arr_time.minutes,
-                  r3.dep_time.minutes,
-                  query.minTransfer
-                )
-              )
-                return;
-              const legs = [r1, r2, r3];
-              if (!isPriceable(legs)) return;
-              results.push(
-                new Itinerary({
-                  legs,
-                  chosenClass,
-                  transfers: this.buildTransfers(legs)
-                })
-              );
-            });
-          });
-        });
-      }
+    search(routes, query) {
+      const table = RouteTable.of(routes);
+      const chosenClass = query.chosenClass || "second";
+      const maxLegs = Math.min(query.maxStops, ItineraryService.MAX_STOPS) + 1;
+
+      // a leg without a price in the chosen class can never be part of a
+      // priceable itinerary, so drop it before enumerating
+      const price =
+        chosenClass === "first" ? table.priceFirst : table.priceSecond;
+      const isSrc = table.citiesNamed(query.dep_city);
+      const isDst = table.citiesNamed(query.arr_city);
+      // direct-only searches only need the origin -> destination rows
+      const candidates =
+        maxLegs === 1 ? table.rowsBetween(isSrc, isDst) : table.allRows;
+      const rows = table
+        .filter(query, candidates)
+        .filter((i) => Number.isFinite(price[i]));
+
+      const found = enumerateConnections(
+        table,
+        rows,
+        isSrc,
+        isDst,
+        maxLegs,
+        this.transferRules(query.minTransfer),
+        {
+          perHour: ItineraryService.TRANSFERS_PER_HOUR,
+          maxResults: ItineraryService.MAX_RESULTS
+        }
+      );
 
+      // direct first, then 1-stop, 2-stop
+      const results = [];
+      found.forEach((flat, idx) => {
+        const nLegs = idx + 1;
+        for (let p = 0; p < flat.length; p += nLegs) {
+          const legs = [];
+          for (let q = 0; q < nLegs; q++) legs.push(table.routes[flat[p + q]]);
+          results.push(
+            new Itinerary({
+              legs,
+              chosenClass,
+              transfers: this.buildTransfers(legs)
+            })
+          );
+        }
+      });
       return results;
     }
   }
@@ -651,10 +968,15 @@
       });
 
       if ($("summary")) {
-        $("summary").textContent =
+        let summary =
           searchResults.length === 0
             ? "No itineraries found."
             : `${searchResults.length} itineraries found.`;
+        if (searchResults.length >= ItineraryService.MAX_RESULTS) {
+          summary +=
+            " Result limit reached; some itineraries with more stops were left out.";
+        }
+        $("summary").textContent = summary;
       }
     }
 
@@ -15,6 +15,10 @@ CREATE TABLE Route (
     second_class    REAL
 );
 
+-- route lookups by city pair (case-insensitive, matches the API filters)
+CREATE INDEX idx_route_dep_arr
+    ON Route (departure_city COLLATE NOCASE, arrival_city COLLATE NOCASE);
+
 CREATE TABLE Traveller (
     traveller_id INTEGER PRIMARY KEY AUTOINCREMENT,
     first_name   TEXT NOT NULL,
@@ -1,27 +1,142 @@
+import atexit
+import os
 import sqlite3
+import threading
+from functools import lru_cache
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from datetime import datetime, date
 
+try:
+    import orjson  # optional, much faster for the full route list
+except ImportError:
+    orjson = None
+
 DB_FILE = "railway.db"
 
 app = Flask(__name__)
 CORS(app)  # allow calls from your JS
 
+def json_response(obj):
+    if orjson is None:
+        return jsonify(obj)
+    return app.response_class(orjson.dumps(obj), mimetype="application/json")
+
+# one connection for the whole app, shared by the request threads;
+# db_lock serializes access to it
+_conn = None
+db_lock = threading.Lock()
+
 def get_db():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        _conn.row_factory = sqlite3.Row
+        _conn.execute("PRAGMA journal_mode=WAL")
+    return _conn
+
+# WAL mode is stored in the DB file; on shutdown switch back so the WAL is
+# checkpointed into railway.db and the -wal/-shm files are removed
+@atexit.register
+def close_db():
+    global _conn
+    if _conn is None:
+        return
+    with db_lock:
+        try:
+            _conn.execute("PRAGMA journal_mode=DELETE")
+        except sqlite3.OperationalError:
+            pass  # another process still has the DB open; stays in WAL
+        _conn.close()
+        _conn = None
+
+FIND_TRAVELLER_SQL = """
+    SELECT * FROM Traveller
+    WHERE lower(last_name) = ? AND lower(gov_id) = ?
+"""
+
+TRIPS_FOR_TRAVELLER_SQL = """
+    SELECT t.trip_id, t.travel_date, t.origin, t.destination,
+           t.stops, t.total_duration, t.fare_class, t.path_summary,
+           tt.ticket_price
+    FROM Trip t
+    JOIN TripTraveller tt ON t.trip_id = tt.trip_id
+    WHERE tt.traveller_id = ?
+    ORDER BY t.travel_date ASC
+"""
+
+def db_version():
+    # mtimes of the DB file and its WAL; changes whenever the data does.
+    # The connection is opened first, since switching to WAL touches the DB
+    # file. The first read then creates an empty -wal, which holds no data
+    # and so counts the same as a missing one
+    with db_lock:
+        get_db()
+    return tuple(
+        os.path.getmtime(p) if os.path.exists(p) and os.path.getsize(p) else None
+        for p in (DB_FILE, DB_FILE + "-wal")
+    )
+
+# route rows only change when the DB file does, so cache them per version
+@lru_cache(maxsize=32)
+def cached_routes(version, dep_city=None, arr_city=None, limit=None, offset=None):
+    where, params = [], []
+    if dep_city:
+        where.append("departure_city = ? COLLATE NOCASE")
+        params.append(dep_city)
+    if arr_city:
+        where.append("arrival_city = ? COLLATE NOCASE")
+        params.append(arr_city)
 
-# Example: fetch routes (you can extend/optimize)
+    sql = "SELECT * FROM Route"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if limit is not None or offset is not None:
+        # stable order so pages don't overlap
+        sql += " ORDER BY route_id LIMIT ? OFFSET ?"
+        params += [limit if limit is not None else -1, offset or 0]
+
+    with db_lock:
+        cur = get_db().execute(sql, params)
+        cols = [c[0] for c in cur.description]
+        rows = [dict(zip(cols, r)) for r in cur.fetchall()]
+    return rows
+
+def find_traveller_ids(cur, gov_ids):
+    # gov_id -> traveller_id for the travellers that already exist
+    if not gov_ids:
+        return {}
+    marks = ",".join("?" * len(gov_ids))
+    cur.execute(
+        f"SELECT gov_id, traveller_id FROM Traveller WHERE gov_id IN ({marks})",
+        gov_ids,
+    )
+    return {row["gov_id"]: row["traveller_id"] for row in cur.fetchall()}
+
+def parse_count(raw):
+    # None if absent; ValueError unless a non-negative integer
+    if raw is None or raw.strip() == "":
+        return None
+    value = int(raw)
+    if value < 0:
+        raise ValueError(raw)
+    return value
+
+# Fetch routes; optional ?from=&to= (exact city, case-insensitive) and
+# ?limit=&offset= for paging. No params returns the whole table.
 @app.get("/api/routes")
 def get_routes():
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM Route")
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-    return jsonify(rows)
+    dep_city = request.args.get("from", "").strip() or None
+    arr_city = request.args.get("to", "").strip() or None
+    try:
+        limit = parse_count(request.args.get("limit"))
+        offset = parse_count(request.args.get("offset"))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers >= 0"}), 400
+
+    return json_response(
+        cached_routes(db_version(), dep_city, arr_city, limit, offset)
+    )
 
 # Book a trip
 @app.post("/api/trips")
@@ -39,69 +154,71 @@ def book_trip():
     price_per_passenger = data["price_per_passenger"]
     travellers = data["travellers"]         # list of {name, age, gov_id}
 
-    conn = get_db()
-    cur = conn.cursor()
+    # one transaction for the trip and all its traveller links
+    with db_lock:
+        conn = get_db()
+        with conn:
+            cur = conn.cursor()
 
-    # insert trip
-    created_at = datetime.utcnow().isoformat()
-    cur.execute(
-        """
-        INSERT INTO Trip
-        (travel_date, origin, destination, stops, total_duration, fare_class, path_summary, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            travel_date,
-            origin,
-            destination,
-            stops,
-            total_duration,
-            fare_class,
-            path_summary,
-            created_at,
-        ),
-    )
-    trip_id = cur.lastrowid
-
-    # ensure travellers exist + link
-    for t in travellers:
-        full = t["name"].strip()
-        gov = t["gov_id"].strip()
-        age = t.get("age")
-
-        parts = full.split()
-        if len(parts) == 1:
-            first, last = parts[0], parts[0]
-        else:
-            last = parts[-1]
-            first = " ".join(parts[:-1])
-
-        # find or create traveller by gov_id
-        cur.execute("SELECT * FROM Traveller WHERE gov_id = ?", (gov,))
-        row = cur.fetchone()
-        if row:
-            traveller_id = row["traveller_id"]
-        else:
+            # insert trip
+            created_at = datetime.utcnow().isoformat()
             cur.execute(
                 """
-                INSERT INTO Traveller (first_name, last_name, gov_id, age)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO Trip
+                (travel_date, origin, destination, stops, total_duration, fare_class, path_summary, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (first, last, gov, age),
+                (
+                    travel_date,
+                    origin,
+                    destination,
+                    stops,
+                    total_duration,
+                    fare_class,
+                    path_summary,
+                    created_at,
+                ),
             )
-            traveller_id = cur.lastrowid
+            trip_id = cur.lastrowid
+
+            # ensure travellers exist (one lookup + one batch insert), then link
+            gov_ids = [t["gov_id"].strip() for t in travellers]
+            traveller_ids = find_traveller_ids(cur, gov_ids)
 
-        # link
-        cur.execute(
-            """
-            INSERT INTO TripTraveller (trip_id, traveller_id, seat_class, ticket_price)
-            VALUES (?, ?, ?, ?)
-            """,
-            (trip_id, traveller_id, fare_class, price_per_passenger),
-        )
+            missing = {}
+            for t, gov in zip(travellers, gov_ids):
+                if gov in traveller_ids or gov in missing:
+                    continue
+                full = t["name"].strip()
+                parts = full.split()
+                if len(parts) == 1:
+                    first, last = parts[0], parts[0]
+                else:
+                    last = parts[-1]
+                    first = " ".join(parts[:-1])
+                missing[gov] = (first, last, gov, t.get("age"))
 
-    conn.commit()
-    conn.close()
+            if missing:
+                cur.executemany(
+                    """
+                    INSERT INTO Traveller (first_name, last_name, gov_id, age)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    list(missing.values()),
+                )
+                traveller_ids.update(find_traveller_ids(cur, list(missing)))
+
+            # link
+            cur.executemany(
+                """
+                INSERT INTO TripTraveller (trip_id, traveller_id, seat_class, ticket_price)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (trip_id, traveller_ids[gov], fare_class, price_per_passenger)
+                    for gov in gov_ids
+                ],
+            )
 
     # return numeric trip id
     return jsonify({"trip_id": trip_id}), 201
@@ -114,41 +231,22 @@ def get_trips_for_passenger():
     if not last_name or not gov_id:
         return jsonify({"error": "Missing last_name or gov_id"}), 400
 
-    conn = get_db()
-    cur = conn.cursor()
-
-    # find traveller
-    cur.execute(
-        """
-        SELECT * FROM Traveller
-        WHERE lower(last_name) = ? AND lower(gov_id) = ?
-        """,
-        (last_name, gov_id),
-    )
-    traveller = cur.fetchone()
-    if not traveller:
-        conn.close()
-        return jsonify({"upcoming": [], "history": []})
+    with db_lock:
+        conn = get_db()
 
-    traveller_id = traveller["traveller_id"]
+        # find traveller
+        traveller = conn.execute(FIND_TRAVELLER_SQL, (last_name, gov_id)).fetchone()
+        if not traveller:
+            return jsonify({"upcoming": [], "history": []})
 
-    # find linked trips
-    cur.execute(
-        """
-        SELECT t.trip_id, t.travel_date, t.origin, t.destination,
-               t.stops, t.total_duration, t.fare_class, t.path_summary,
-               tt.ticket_price
-        FROM Trip t
-        JOIN TripTraveller tt ON t.trip_id = tt.trip_id
-        WHERE tt.traveller_id = ?
-        ORDER BY t.travel_date ASC
-        """,
-        (traveller_id,),
-    )
+        # find linked trips
+        trips = conn.execute(
+            TRIPS_FOR_TRAVELLER_SQL, (traveller["traveller_id"],)
+        ).fetchall()
 
     today = date.today().isoformat()
     upcoming, history = [], []
-    for row in cur.fetchall():
+    for row in trips:
         rec = {
             "trip_id": row["trip_id"],
             "date": row["travel_date"],
@@ -161,7 +259,6 @@ def get_trips_for_passenger():
         else:
             history.append(rec)
 
-    conn.close()
     return jsonify({"upcoming": upcoming, "history": history})
 
 if __name__ == "__main__":